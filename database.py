@@ -1,32 +1,56 @@
+import asyncio
 import os
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient, IndexModel
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
+# Size the pool to the expected number of concurrent in-flight queries per worker,
+# not as high as possible: past that point connection contention costs throughput.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "5"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
 DB_NAME = "assessment_db"
 COLLECTION_NAME = "employees"
 
 class MongoDB:
     def __init__(self):
-        self.client: AsyncIOMotorClient = None
+        self.client: AsyncMongoClient = None
         self.db = None
         self.collection = None
 
     async def connect(self):
+        self.client = AsyncMongoClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS
+        )
+        self.db = self.client[DB_NAME]
+        self.collection = self.db[COLLECTION_NAME]
         try:
-            self.client = AsyncIOMotorClient(MONGO_URI)
-            self.db = self.client[DB_NAME]
-            self.collection = self.db[COLLECTION_NAME]
-            print("Successfully connected to MongoDB!")
+            await asyncio.gather(*(self.client.admin.command("ping") for _ in range(max(MONGO_MIN_POOL_SIZE, 1))))
         except Exception as e:
             print(f"Failed to connect to MongoDB: {e}")
+            raise
+        print("Successfully connected to MongoDB!")
+        try:
+            await self.collection.create_indexes([
+                IndexModel([("employee_id", 1)], unique=True),
+                IndexModel([("department", 1), ("joining_date", -1), ("_id", -1)]),
+                IndexModel([("skills", 1)]),
+                IndexModel([("department", 1), ("salary", 1)])
+            ])
+        except Exception as e:
+            print(f"Failed to create MongoDB indexes, refusing to start without employee_id uniqueness: {e}")
+            raise
 
     async def close(self):
         if self.client:
-            self.client.close()
+            await self.client.close()
             print("MongoDB connection closed.")
 
 db_client = MongoDB()
@@ -1,18 +1,80 @@
-from fastapi import FastAPI, HTTPException, Query, status
-from models import EmployeeCreate, Employee, EmployeeUpdate, AverageSalaryByDepartment
-from database import db_client
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response, status
+from models import EmployeeCreate, Employee, EmployeeUpdate, AverageSalaryByDepartment, BulkEmployeeResult
+from database import db_client, REDIS_URL
 from typing import List, Optional
-from datetime import date, datetime
+from datetime import datetime
+from hashlib import blake2b
 from fastapi.encoders import jsonable_encoder
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache
+from fastapi_cache.key_builder import default_key_builder
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+EMPLOYEE_PROJECTION = {"_id": {"$toString": "$_id"}, **{field: 1 for field in Employee.model_fields if field != "id"}}
+LIST_BATCH_SIZE = 500
+EMPLOYEE_LIST_ADAPTER = TypeAdapter(List[Employee])
+AVG_SALARY_LIST_ADAPTER = TypeAdapter(List[AverageSalaryByDepartment])
+CACHE_PREFIX = "emp-cache"
+AVG_SALARY_CACHE_NAMESPACE = "avg-salary"
+AVG_SALARY_CACHE_TTL = 60
+AVG_SALARY_GENERATION_KEY = f"{CACHE_PREFIX}:{AVG_SALARY_CACHE_NAMESPACE}:generation"
+
+coll = None
+redis_client = None
 
 app = FastAPI(
     title="Employee Management API",
-    description="A FastAPI backend for managing employee data with MongoDB."
+    description="A FastAPI backend for managing employee data with MongoDB.",
+    default_response_class=ORJSONResponse
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+def employee_list_response(employees: List[dict]) -> Response:
+    validated = EMPLOYEE_LIST_ADAPTER.validate_python(employees)
+    return Response(content=EMPLOYEE_LIST_ADAPTER.dump_json(validated, by_alias=True), media_type="application/json")
+
+def employee_etag(employee: dict) -> str:
+    return f'W/"{employee["_id"]}-{employee.get("version", 0)}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+async def avg_salary_key_builder(func, namespace: str = "", *, request=None, response=None, args=(), kwargs=None):
+    # Writes bump the generation instead of deleting keys, so stale entries are
+    # simply never read again and expire through their TTL.
+    try:
+        generation = await redis_client.get(AVG_SALARY_GENERATION_KEY)
+    except RedisError:
+        generation = None
+    generation = generation.decode() if generation else "0"
+    return default_key_builder(
+        func, f"{namespace}:{generation}", request=request, response=response, args=args, kwargs=kwargs or {}
+    )
+
+async def invalidate_avg_salary_cache():
+    try:
+        await redis_client.incr(AVG_SALARY_GENERATION_KEY)
+    except RedisError as e:
+        print(f"Failed to invalidate the avg-salary cache: {e}")
 
 @app.on_event("startup")
 async def startup_db_client():
+    global coll, redis_client
     await db_client.connect()
+    coll = db_client.collection
+    redis_client = aioredis.from_url(REDIS_URL)
+    FastAPICache.init(RedisBackend(redis_client), prefix=CACHE_PREFIX)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
@@ -20,89 +82,155 @@ async def shutdown_db_client():
 
 @app.post("/employees/", response_model=Employee, status_code=status.HTTP_201_CREATED)
 async def create_employee(employee: EmployeeCreate):
-    existing_employee = await db_client.collection.find_one({"employee_id": employee.employee_id})
-    if existing_employee:
+    employee_data = employee.model_dump(by_alias=True)
+    try:
+        created_employee = await coll.insert_one(employee_data)
+    except DuplicateKeyError:
         raise HTTPException(
             status_code=400,
             detail=f"Employee with employee_id '{employee.employee_id}' already exists."
         )
-    employee_data = employee.model_dump(by_alias=True)
-    if "joining_date" in employee_data:
-        employee_data["joining_date"] = datetime.combine(employee_data["joining_date"], datetime.min.time())
-    created_employee = await db_client.collection.insert_one(employee_data)
-    new_employee = await db_client.collection.find_one({"_id": created_employee.inserted_id})
-    new_employee["_id"] = str(new_employee["_id"])
-    return Employee(**new_employee)
+    await invalidate_avg_salary_cache()
+    employee_data["_id"] = str(created_employee.inserted_id)
+    return Employee(**employee_data)
+
+@app.post("/employees/bulk", response_model=List[BulkEmployeeResult], status_code=status.HTTP_201_CREATED)
+async def create_employees_bulk(response: Response, employees: List[EmployeeCreate] = Body(..., max_length=1000)):
+    if not employees:
+        return []
+    employee_docs = [employee.model_dump(by_alias=True) for employee in employees]
+    errors = {}
+    try:
+        await coll.insert_many(employee_docs, ordered=False)
+    except BulkWriteError as bwe:
+        for write_error in bwe.details["writeErrors"]:
+            errors[write_error["index"]] = write_error["errmsg"]
+    if len(errors) == len(employee_docs):
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    else:
+        await invalidate_avg_salary_cache()
+        if errors:
+            response.status_code = status.HTTP_207_MULTI_STATUS
+    return [
+        BulkEmployeeResult(
+            employee_id=employee.employee_id,
+            inserted=index not in errors,
+            error=errors.get(index)
+        )
+        for index, employee in enumerate(employees)
+    ]
+
+@cache(expire=AVG_SALARY_CACHE_TTL, namespace=AVG_SALARY_CACHE_NAMESPACE, key_builder=avg_salary_key_builder)
+async def compute_average_salary_by_department(department: Optional[str], since: Optional[datetime]) -> List[dict]:
+    match = {}
+    if department:
+        match["department"] = department
+    if since:
+        match["joining_date"] = {"$gte": since}
+    pipeline = [{"$match": match}] if match else []
+    pipeline += [
+        {"$group": {
+            "_id": "$department",
+            "avg_salary": {"$avg": "$salary"}
+        }},
+        {"$project": {
+            "department": "$_id",
+            "avg_salary": {"$round": ["$avg_salary", 2]},
+            "_id": 0
+        }},
+        {"$sort": {"department": 1}}
+    ]
+    avg_salaries = []
+    async for doc in await coll.aggregate(pipeline):
+        avg_salaries.append(doc)
+    return avg_salaries
+
+@app.get("/employees/avg-salary", response_model=List[AverageSalaryByDepartment])
+async def get_average_salary_by_department(
+    request: Request,
+    department: Optional[str] = Query(None),
+    since: Optional[datetime] = Query(None, description="Only include employees who joined on or after this date")
+):
+    avg_salaries = await compute_average_salary_by_department(department=department, since=since)
+    content = AVG_SALARY_LIST_ADAPTER.dump_json(AVG_SALARY_LIST_ADAPTER.validate_python(avg_salaries))
+    etag = f'W/"{blake2b(content, digest_size=8).hexdigest()}"'
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return Response(content=content, media_type="application/json", headers={"ETag": etag})
+
+@app.get("/employees/search", response_model=List[Employee])
+async def search_employees_by_skill(
+    skill: str = Query(..., description="The skill to search for"),
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0)
+):
+    query = {"skills": skill}
+    pipeline = [
+        {"$match": query},
+        {"$sort": {"_id": 1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": EMPLOYEE_PROJECTION}
+    ]
+    cursor = await coll.aggregate(pipeline, batchSize=LIST_BATCH_SIZE)
+    employees = await cursor.to_list(length=limit)
+    return employee_list_response(employees)
 
 @app.get("/employees/{employee_id}", response_model=Employee)
-async def get_employee_by_id(employee_id: str):
-    employee = await db_client.collection.find_one({"employee_id": employee_id})
+async def get_employee_by_id(employee_id: str, request: Request, response: Response):
+    employee = await coll.find_one({"employee_id": employee_id})
     if employee:
         employee["_id"] = str(employee["_id"])
+        etag = employee_etag(employee)
+        if etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         return Employee(**employee)
     raise HTTPException(status_code=404, detail="Employee not found")
 
 @app.put("/employees/{employee_id}", response_model=Employee)
-async def update_employee(employee_id: str, employee_update: EmployeeUpdate):
-    existing_employee = await db_client.collection.find_one({"employee_id": employee_id})
-    if not existing_employee:
-        raise HTTPException(status_code=404, detail="Employee not found")
-    update_data = {k: v for k, v in employee_update.model_dump(exclude_unset=True).items()}
-    if "joining_date" in update_data and isinstance(update_data["joining_date"], date):
-        update_data["joining_date"] = datetime.combine(update_data["joining_date"], datetime.min.time())
+async def update_employee(employee_id: str, employee_update: EmployeeUpdate, response: Response):
+    update_data = employee_update.model_dump(exclude_unset=True)
     if not update_data:
-        existing_employee["_id"] = str(existing_employee["_id"])
-        return Employee(**existing_employee)
-    await db_client.collection.update_one(
-        {"employee_id": employee_id},
-        {"$set": update_data}
-    )
-    updated_employee = await db_client.collection.find_one({"employee_id": employee_id})
+        updated_employee = await coll.find_one({"employee_id": employee_id})
+    else:
+        updated_employee = await coll.find_one_and_update(
+            {"employee_id": employee_id},
+            {"$set": update_data, "$inc": {"version": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+    if not updated_employee:
+        raise HTTPException(status_code=404, detail="Employee not found")
+    if update_data:
+        await invalidate_avg_salary_cache()
     updated_employee["_id"] = str(updated_employee["_id"])
+    response.headers["ETag"] = employee_etag(updated_employee)
     return Employee(**updated_employee)
 
 @app.delete("/employees/{employee_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_employee(employee_id: str):
-    delete_result = await db_client.collection.delete_one({"employee_id": employee_id})
+    delete_result = await coll.delete_one({"employee_id": employee_id})
     if delete_result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Employee not found")
+    await invalidate_avg_salary_cache()
     return
 
 @app.get("/employees/", response_model=List[Employee])
-async def list_employees_by_department(department: Optional[str] = Query(None)):
+async def list_employees_by_department(
+    department: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0)
+):
     query = {}
     if department:
         query["department"] = department
-    employees = []
-    async for employee in db_client.collection.find(query).sort("joining_date", -1):
-        employee["_id"] = str(employee["_id"])
-        employees.append(Employee(**employee))
-    return employees
-
-@app.get("/employees/avg-salary", response_model=List[AverageSalaryByDepartment])
-async def get_average_salary_by_department():
     pipeline = [
-        {"$group": {
-            "_id": "$department",
-            "avg_salary": {"$avg": "$salary"}
-        }},
-        {"$project": {
-            "department": "$_id",
-            "avg_salary": {"$round": ["$avg_salary", 2]},
-            "_id": 0
-        }},
-        {"$sort": {"department": 1}}
+        {"$match": query},
+        {"$sort": {"joining_date": -1, "_id": -1}},
+        {"$skip": skip},
+        {"$limit": limit},
+        {"$project": EMPLOYEE_PROJECTION}
     ]
-    avg_salaries = []
-    async for doc in db_client.collection.aggregate(pipeline):
-        avg_salaries.append(AverageSalaryByDepartment(**doc))
-    return avg_salaries
-
-@app.get("/employees/search", response_model=List[Employee])
-async def search_employees_by_skill(skill: str = Query(..., description="The skill to search for")):
-    query = {"skills": skill}
-    employees = []
-    async for employee in db_client.collection.find(query):
-        employee["_id"] = str(employee["_id"])
-        employees.append(Employee(**employee))
-    return employees
+    cursor = await coll.aggregate(pipeline, batchSize=LIST_BATCH_SIZE)
+    employees = await cursor.to_list(length=limit)
+    return employee_list_response(employees)
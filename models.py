@@ -1,55 +1,20 @@
 from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel, Field, GetCoreSchemaHandler
-from pydantic_core import core_schema
-from bson import ObjectId
-
-
-class PyObjectId(ObjectId):
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
-
-    @classmethod
-    def validate(cls, v):
-        if not ObjectId.is_valid(v):
-            raise ValueError("Invalid ObjectId")
-        return ObjectId(v)
-
-    @classmethod
-    def __get_pydantic_core_schema__(cls, source, handler: GetCoreSchemaHandler):
-        return core_schema.json_or_python_schema(
-            json_schema=core_schema.str_schema(),
-            python_schema=core_schema.no_info_after_validator_function(
-                cls.validate,
-                core_schema.str_schema()
-            ),
-            serialization=core_schema.to_string_ser_schema(),
-        )
-
-    @classmethod
-    def __get_pydantic_json_schema__(cls, schema, handler: GetCoreSchemaHandler):
-        
-        json_schema = handler(schema)
-        json_schema.update(
-            type="string",
-            examples=["64f8b7b7e1f4b3b2c2c2c2c2"] 
-        )
-        return json_schema
+from pydantic import BaseModel, Field, field_validator
 
 
 class Employee(BaseModel):
-    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    id: str = Field(default="", alias="_id")
     employee_id: str = Field(..., example="E123")
     name: str = Field(..., example="John Doe")
     department: str = Field(..., example="Engineering")
     salary: float = Field(..., example=75000)
     joining_date: datetime
     skills: List[str] = Field(..., example=["Python", "MongoDB"])
+    version: int = Field(0, example=1)
 
     class Config:
-        arbitrary_types_allowed = True
-        json_encoders = {ObjectId: str}
+        populate_by_name = True
 
 
 
@@ -61,6 +26,11 @@ class EmployeeCreate(BaseModel):
     joining_date: datetime
     skills: List[str] = Field(..., example=["Python", "MongoDB"])
 
+    @field_validator("joining_date")
+    @classmethod
+    def normalize_joining_date(cls, v: datetime) -> datetime:
+        return datetime.combine(v.date(), datetime.min.time())
+
 
 
 class EmployeeUpdate(BaseModel):
@@ -70,8 +40,22 @@ class EmployeeUpdate(BaseModel):
     joining_date: Optional[datetime] = None
     skills: Optional[List[str]] = Field(None, example=["Communication", "Recruitment"])
 
+    @field_validator("joining_date")
+    @classmethod
+    def normalize_joining_date(cls, v: Optional[datetime]) -> Optional[datetime]:
+        if v is None:
+            return v
+        return datetime.combine(v.date(), datetime.min.time())
+
 
 
 class AverageSalaryByDepartment(BaseModel):
     department: str
     avg_salary: float
+
+
+
+class BulkEmployeeResult(BaseModel):
+    employee_id: str
+    inserted: bool
+    error: Optional[str] = None